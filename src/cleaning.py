@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Deque, Iterable, Iterator, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 
 @dataclass(frozen=True)
@@ -14,70 +24,169 @@ class CleaningConfig:
     high_value_threshold: float = 100.0 # for later metrics if needed
 
 
-def drop_unnamed_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Drop export padding columns like 'Unnamed: 0', 'Unnamed: 1', etc."""
-    cols_to_drop = [c for c in df.columns if str(c).startswith("Unnamed:")]
-    return df.drop(columns=cols_to_drop, errors="ignore")
+# Output dtypes of the derived analysis columns (created directly in these
+# dtypes by clean_single_file, so no whole-frame astype is needed)
+ANALYSIS_DTYPES = {
+    "site": "string[pyarrow]",
+    "file_month": "string[pyarrow]",
+    "refund_category": "string[pyarrow]",
+    "refund_amount": "float64[pyarrow]",
+}
+
+# Arrow -> pandas dtype mapping used when reading the cleaned Parquet back
+_PARQUET_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+    pa.float64(): pd.ArrowDtype(pa.float64()),
+}
+
+# Date formats seen in the exports, tried in order: 26/01/2026, 02-Jan-26.
+# Anything else (times like 19:10, codes like OTH) is not a date and falls
+# through to the next candidate column.
+DATE_FORMATS = ("%d/%m/%Y", "%d-%b-%y")
+
+# Required raw schema: the source columns the pipeline uses (in export order),
+# all read as Arrow-backed strings. ROOM carries stray booking references in
+# some exports and is coerced later by build_refund_amount.
+#
+# read_raw_csv guarantees every column is present (missing ones become
+# all-null), so the helpers below do not guard for missing columns.
+RAW_SCHEMA = {
+    "RECEIPT_NO": "string[pyarrow]",
+    "BUSINESS_FORMAT_DATE": "string[pyarrow]",
+    "BUSINESS_TIME": "string[pyarrow]",
+    "BUSINESS_DATE": "string[pyarrow]",
+    "ROOM": "string[pyarrow]",
+}
+
+# Everything else in the export (including 'Unnamed:' padding) is skipped at parse time.
+NEEDED_COLS = tuple(RAW_SCHEMA)
+
+
+def ensure_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Conform a pandas-parsed raw frame to RAW_SCHEMA: add missing columns as
+    typed nulls and cast the rest. The pyarrow read path gets the same result
+    from its ConvertOptions and does not need this.
+    """
+    missing = {
+        c: pd.Series(pd.NA, index=df.index, dtype=dtype)
+        for c, dtype in RAW_SCHEMA.items()
+        if c not in df.columns
+    }
+    if missing:
+        df = df.assign(**missing)
+
+    mismatched = {c: dtype for c, dtype in RAW_SCHEMA.items() if df[c].dtype != dtype}
+    if mismatched:
+        df = df.astype(mismatched)
+    return df
 
 
+def read_raw_csv(path: Path) -> pd.DataFrame:
+    """
+    Multi-threaded pyarrow CSV read of the RAW_SCHEMA columns, returned as
+    Arrow-backed pandas string columns. A column missing from the export
+    comes back all-null.
+
+    pyarrow rejects ragged files (rows with fewer fields than the header);
+    those fall back to pandas' parser, which pads short rows with nulls.
+    """
+    try:
+        table = pacsv.read_csv(
+            path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=4 << 20),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=list(NEEDED_COLS),
+                include_missing_columns=True,
+                column_types={c: pa.string() for c in NEEDED_COLS},
+                strings_can_be_null=True,
+            ),
+        )
+    except pa.ArrowInvalid:
+        df = pd.read_csv(path, usecols=lambda c: c in RAW_SCHEMA, dtype="string[pyarrow]")
+        return ensure_schema(df)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+# Normalize site spellings
+_SITE_MAP = {
+    "brighton": "Brighton",
+    "newheaven": "Newhaven",
+    "newhaven": "Newhaven",
+}
+
+# Your project: November + December = 2025, January = 2026
+_MONTH_MAP = {
+    "november": "Nov-2025",
+    "nov": "Nov-2025",
+    "december": "Dec-2025",
+    "dec": "Dec-2025",
+    "january": "Jan-2026",
+    "jan": "Jan-2026",
+}
+
+# <site>_<month>[_...][.csv]
+_FILENAME_RE = re.compile(r"^([^_]+)_([^_]+?)(?:\.csv)?(?:_|$)")
+
+
+@lru_cache(maxsize=256)
 def parse_site_and_month_from_filename(filename: str) -> Tuple[str, str]:
     """
     Expected pattern examples:
       Brighton_November_refund.csv
       Newheaven_January_refund.csv
 
+    Pass the basename (e.g. `path.name`); results are cached per filename.
+
     Returns:
       site: 'Brighton' / 'Newhaven' (normalized)
       file_month: 'Nov-2025' / 'Dec-2025' / 'Jan-2026' (based on your project months)
     """
-    name = Path(filename).name
-    parts = name.replace(".csv", "").split("_")
-    if len(parts) < 2:
+    m = _FILENAME_RE.match(Path(filename).name)
+    if m is None:
         raise ValueError(f"Unexpected filename format: {filename}")
 
-    raw_site = parts[0].strip()
-    raw_month = parts[1].strip().lower()
+    raw_site = m.group(1).strip()
+    raw_month = m.group(2).strip().lower()
 
-    # Normalize site spellings
-    site_map = {
-        "brighton": "Brighton",
-        "newheaven": "Newhaven",
-        "newhaven": "Newhaven",
-    }
-    site = site_map.get(raw_site.lower(), raw_site)
-
-    # Your project: November + December = 2025, January = 2026
-    month_map = {
-        "november": "Nov-2025",
-        "nov": "Nov-2025",
-        "december": "Dec-2025",
-        "dec": "Dec-2025",
-        "january": "Jan-2026",
-        "jan": "Jan-2026",
-    }
-    if raw_month not in month_map:
+    site = _SITE_MAP.get(raw_site.lower(), raw_site)
+
+    if raw_month not in _MONTH_MAP:
         raise ValueError(f"Unexpected month in filename: {filename}")
 
-    return site, month_map[raw_month]
+    return site, _MONTH_MAP[raw_month]
+
 
+def lowered_description(df: pd.DataFrame) -> pd.Series:
+    """Lowercased BUSINESS_FORMAT_DATE (Arrow string)."""
+    return df["BUSINESS_FORMAT_DATE"].str.lower()
 
-def add_file_metadata(df: pd.DataFrame, filename: str) -> pd.DataFrame:
-    site, file_month = parse_site_and_month_from_filename(filename)
-    out = df.copy()
-    out["site"] = site
-    out["file_month"] = file_month
-    return out
 
+def _contains(s: pd.Series, pattern: str, regex: bool = False) -> np.ndarray:
+    """
+    Substring / regex match straight on the Arrow string buffer
+    (pyarrow.compute, C++ kernels). Nulls count as no match.
+    """
+    match = pc.match_substring_regex if regex else pc.match_substring
+    return pc.fill_null(match(pa.array(s), pattern), False).to_numpy(zero_copy_only=False)
 
-def is_refund_row(df: pd.DataFrame, config: CleaningConfig) -> pd.Series:
+
+def is_refund_row(
+    df: pd.DataFrame,
+    config: CleaningConfig,
+    lowered: Optional[pd.Series] = None,
+) -> pd.Series:
     """
     Refund indicator: BUSINESS_FORMAT_DATE contains 'Refund' (case-insensitive).
-    If BUSINESS_FORMAT_DATE missing, returns all False.
+    A null BUSINESS_FORMAT_DATE is not a refund.
+
+    lowered: output of lowered_description(df), to reuse an already
+    lowercased column instead of lowercasing it again.
     """
-    col = "BUSINESS_FORMAT_DATE"
-    if col not in df.columns:
-        return pd.Series([False] * len(df), index=df.index)
-    return df[col].astype(str).str.contains(config.refund_keyword, case=False, na=False)
+    if lowered is None:
+        lowered = lowered_description(df)
+    return pd.Series(_contains(lowered, config.refund_keyword.lower()), index=df.index)
 
 
 def build_transaction_date(df: pd.DataFrame) -> pd.Series:
@@ -87,26 +196,28 @@ def build_transaction_date(df: pd.DataFrame) -> pd.Series:
       - if missing, fallback to BUSINESS_TIME
       - if still missing, fallback to BUSINESS_FORMAT_DATE
     Output: pandas datetime64[ns] (NaT if cannot parse)
-    """
-    # Helper: parse a series to datetime with coercion
-    def _to_dt(s: pd.Series) -> pd.Series:
-        return pd.to_datetime(s, errors="coerce", dayfirst=True)
-
-    dt = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
 
-    if "BUSINESS_DATE" in df.columns:
-        dt1 = _to_dt(df["BUSINESS_DATE"])
-        dt = dt.fillna(dt1)
+    Expects the already-filtered refund rows, so parsing only touches those.
+    """
+    # Helper: parse with each explicit export format (C strptime path) in turn,
+    # only retrying values the previous formats did not match.
+    def _to_dt(s: pd.Series) -> np.ndarray:
+        dt = pd.to_datetime(s, errors="coerce", format=DATE_FORMATS[0], cache=True)
+        for fmt in DATE_FORMATS[1:]:
+            retry = dt.isna() & s.notna()
+            if not retry.any():
+                break
+            dt.loc[retry] = pd.to_datetime(s.loc[retry], errors="coerce", format=fmt, cache=True)
+        return dt.to_numpy(dtype="datetime64[ns]")
 
-    if "BUSINESS_TIME" in df.columns:
-        dt2 = _to_dt(df["BUSINESS_TIME"])
-        dt = dt.fillna(dt2)
+    parsed = [_to_dt(df[c]) for c in ("BUSINESS_DATE", "BUSINESS_TIME", "BUSINESS_FORMAT_DATE")]
 
-    if "BUSINESS_FORMAT_DATE" in df.columns:
-        dt3 = _to_dt(df["BUSINESS_FORMAT_DATE"])
-        dt = dt.fillna(dt3)
+    # Coalesce in priority order: first non-NaT candidate wins
+    dt = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for arr in reversed(parsed):
+        dt = np.where(np.isnat(arr), dt, arr)
 
-    return dt
+    return pd.Series(dt, index=df.index)
 
 
 def build_refund_amount(df: pd.DataFrame, config: CleaningConfig) -> pd.Series:
@@ -117,14 +228,10 @@ def build_refund_amount(df: pd.DataFrame, config: CleaningConfig) -> pd.Series:
       - absolute value
       - outlier filter: remove > max_refund_amount => NaN
     """
-    if "ROOM" not in df.columns:
-        return pd.Series([pd.NA] * len(df), index=df.index, dtype="Float64")
-
-    amt = pd.to_numeric(df["ROOM"], errors="coerce")
-    amt = amt.abs()
-
-    amt = amt.where(amt <= config.max_refund_amount)  # outliers -> NaN
-    return amt.astype("Float64")
+    raw = pd.to_numeric(df["ROOM"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    amt = np.abs(raw)  # the only new buffer; the outlier mask below writes into it
+    amt[amt > config.max_refund_amount] = np.nan  # outliers -> NaN
+    return pd.Series(pd.array(amt, dtype="float64[pyarrow]"), index=df.index)
 
 
 def clean_single_file(path: Path, config: Optional[CleaningConfig] = None) -> pd.DataFrame:
@@ -133,38 +240,103 @@ def clean_single_file(path: Path, config: Optional[CleaningConfig] = None) -> pd
     """
     config = config or CleaningConfig()
 
-    df = pd.read_csv(path, low_memory=False)
-    df = drop_unnamed_columns(df)
-    df = add_file_metadata(df, path.name)
-
-    # Refund filter
-    refund_mask = is_refund_row(df, config)
-    df = df.loc[refund_mask].copy()
-
-    # Create key fields
+    df = read_raw_csv(path)
+
+    # Refund filter + usable refund_amount, evaluated together so the
+    # refund subset is materialized once instead of once per filter.
+    # BUSINESS_FORMAT_DATE is lowercased once and shared by the refund filter
+    # and the category rules.
+    lowered = lowered_description(df)
+    refund_mask = is_refund_row(df, config, lowered)
+    refund_amount = build_refund_amount(df, config)
+    keep = refund_mask & refund_amount.notna()
+    df = df.loc[keep].reset_index(drop=True)
+    refund_amount = refund_amount.loc[keep].reset_index(drop=True)
+
+    # File metadata (scalar columns, assigned on the filtered frame)
+    site, file_month = parse_site_and_month_from_filename(path.name)
+    df["site"] = pd.Series(site, index=df.index, dtype=ANALYSIS_DTYPES["site"])
+    df["file_month"] = pd.Series(file_month, index=df.index, dtype=ANALYSIS_DTYPES["file_month"])
+
+    # Create key fields (dates only parsed for the kept rows)
     df["transaction_date"] = build_transaction_date(df)
-    df["refund_amount"] = build_refund_amount(df, config)
-
-    # Keep only rows with usable refund_amount
-    df = df[df["refund_amount"].notna()].copy()
+    df["refund_amount"] = refund_amount
 
     # Normalize category (Accommodation vs F&B) from BUSINESS_FORMAT_DATE
-    if "BUSINESS_FORMAT_DATE" in df.columns:
-        s = df["BUSINESS_FORMAT_DATE"].astype(str).str.lower()
-        df["refund_category"] = pd.Series(pd.NA, index=df.index, dtype="string")
-        df.loc[s.str.contains("accomm", na=False), "refund_category"] = "Accommodation"
-        df.loc[s.str.contains("f&b", na=False) | s.str.contains("food", na=False) | s.str.contains("bar", na=False), "refund_category"] = "F&B"
-        # Everything else
-        df["refund_category"] = df["refund_category"].fillna("Other").astype("string")
-    else:
-        df["refund_category"] = "Other"
+    s = lowered.loc[keep].reset_index(drop=True)
+    is_fnb = _contains(s, "f&b|food|bar", regex=True)
+    is_acc = _contains(s, "accomm")
+    # F&B wins over Accommodation; everything else is Other
+    category = np.select([is_fnb, is_acc], ["F&B", "Accommodation"], default="Other")
+    df["refund_category"] = pd.array(category, dtype=ANALYSIS_DTYPES["refund_category"])
 
     return df
 
 
-def clean_all_files(raw_dir: Path, config: Optional[CleaningConfig] = None) -> pd.DataFrame:
+def write_parquet_stream(frames: Iterable[pd.DataFrame], out_path: Path) -> None:
+    """
+    Append cleaned frames to one Parquet file in iteration order. Each frame
+    is released once written, so memory is bounded by what the iterator keeps
+    in flight (no list of frames + concat copy).
+
+    Rows go to a sibling ".parquet.tmp" file that only replaces out_path once
+    every frame is written, so a failed run never leaves a truncated (but
+    readable) Parquet file behind.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(".parquet.tmp")
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+            os.replace(tmp_path, out_path)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _clean_in_order(
+    paths: Sequence[Path], config: CleaningConfig, workers: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield cleaned frames in path order, with at most `workers` files submitted
+    ahead of the consumer (Executor.map would submit every file up front).
+    """
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending: Deque[Future] = deque()
+        for p in paths:
+            pending.append(ex.submit(clean_single_file, p, config))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def clean_all_files(
+    raw_dir: Path,
+    config: Optional[CleaningConfig] = None,
+    max_workers: Optional[int] = None,
+    out_path: Optional[Path] = None,
+) -> pd.DataFrame:
     """
     Clean all CSVs in data/raw and return a single consolidated dataframe.
+
+    Files are independent, so they are cleaned concurrently (threads: the CSV
+    parse and string kernels run in C, and threads avoid process start-up cost
+    in notebooks), at most max_workers at a time. Output order follows the
+    sorted file list.
+
+    out_path: optional .parquet destination. Cleaned files are written to it
+    in sorted order as soon as each is ready, so at most max_workers cleaned
+    frames (plus the one being written) are held in memory; the consolidated
+    frame is then read back from disk once.
     """
     config = config or CleaningConfig()
 
@@ -172,10 +344,15 @@ def clean_all_files(raw_dir: Path, config: Optional[CleaningConfig] = None) -> p
     if not paths:
         raise FileNotFoundError(f"No CSVs found in: {raw_dir}")
 
-    frames = [clean_single_file(p, config=config) for p in paths]
-    out = pd.concat(frames, ignore_index=True)
+    workers = max_workers or min(len(paths), os.cpu_count() or 1)
+    frames = _clean_in_order(paths, config, workers)
+    if out_path is None:
+        return pd.concat(list(frames), ignore_index=True)
 
-    return out
+    write_parquet_stream(frames, out_path)
+    # Map types during conversion so the result already has the pipeline's
+    # dtypes (Parquet's pandas metadata loses the string storage).
+    return pq.read_table(out_path).to_pandas(types_mapper=_PARQUET_TYPES.get)
 
 
 def export_processed(df: pd.DataFrame, out_path: Path) -> None:
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 
 
@@ -14,38 +15,63 @@ class SQRIWeights:
     high_value_share_weight: float = 0.2
 
 
-def kpis(df: pd.DataFrame) -> Dict[str, float]:
+def kpis(df: pd.DataFrame, assume_clean: bool = True) -> Dict[str, float]:
+    """
+    assume_clean: refund_amount is already numeric (cleaning output); nulls are skipped.
+    Pass False for raw frames to coerce and drop unusable amounts first.
+    """
     if df.empty:
         return {"refund_count": 0, "total_refund_value": 0.0, "avg_refund_value": 0.0}
-    s = pd.to_numeric(df["refund_amount"], errors="coerce").dropna()
-    total = float(s.sum()) if not s.empty else 0.0
-    count = int(s.shape[0])
-    avg = float(s.mean()) if count else 0.0
+    s = df["refund_amount"]
+    if not assume_clean:
+        s = pd.to_numeric(s, errors="coerce").dropna()
+    # Plain float64 buffer: reductions skip pandas' per-op Series wrapping
+    amt = s.to_numpy(dtype="float64", na_value=np.nan)
+    amt = amt[~np.isnan(amt)]
+    count = int(amt.size)
+    total = float(amt.sum()) if count else 0.0
+    avg = float(amt.mean()) if count else 0.0
     return {"refund_count": count, "total_refund_value": total, "avg_refund_value": avg}
 
 
+def _amount_summary_by(df: pd.DataFrame, key1: str, key2: str) -> pd.DataFrame:
+    """
+    refund_count / total_refund_value / avg_refund_value of refund_amount per
+    (key1, key2), using factorized keys + np.bincount instead of a groupby.
+    Same rows and order as groupby([key1, key2], dropna=False): sorted keys,
+    null keys kept as their own group, count/mean ignore null amounts.
+    """
+    c1, u1 = pd.factorize(df[key1], sort=True, use_na_sentinel=False)
+    c2, u2 = pd.factorize(df[key2], sort=True, use_na_sentinel=False)
+    pairs, group = np.unique(c1.astype(np.int64) * len(u2) + c2, return_inverse=True)
+    n = len(pairs)
+
+    amount = df["refund_amount"].to_numpy(dtype="float64", na_value=np.nan)
+    has_amount = ~np.isnan(amount)
+    count = np.bincount(group, weights=has_amount, minlength=n).astype(np.int64)
+    total = np.bincount(group, weights=np.where(has_amount, amount, 0.0), minlength=n)
+
+    return pd.DataFrame({
+        key1: u1.take(pairs // len(u2)),
+        key2: u2.take(pairs % len(u2)),
+        "refund_count": count,
+        "total_refund_value": total,
+        "avg_refund_value": np.divide(total, count, out=np.full(n, np.nan), where=count > 0),
+    })
+
+
 def by_site_month(df: pd.DataFrame) -> pd.DataFrame:
     """
     Output: site, file_month, refund_count, total_refund_value, avg_refund_value
     """
-    g = (
-        df.groupby(["site", "file_month"], dropna=False)["refund_amount"]
-        .agg(refund_count="count", total_refund_value="sum", avg_refund_value="mean")
-        .reset_index()
-    )
-    return g
+    return _amount_summary_by(df, "site", "file_month")
 
 
 def category_split(df: pd.DataFrame) -> pd.DataFrame:
     """
     Output: site, refund_category, refund_count, total_refund_value, avg_refund_value
     """
-    g = (
-        df.groupby(["site", "refund_category"], dropna=False)["refund_amount"]
-        .agg(refund_count="count", total_refund_value="sum", avg_refund_value="mean")
-        .reset_index()
-    )
-    return g
+    return _amount_summary_by(df, "site", "refund_category")
 
 
 def peak_days(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
@@ -55,16 +81,17 @@ def peak_days(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
     if "transaction_date" not in df.columns:
         return pd.DataFrame(columns=["site", "transaction_date", "daily_refund_value", "daily_refund_count"])
 
-    d = df.copy()
-    d["date_only"] = pd.to_datetime(d["transaction_date"], errors="coerce").dt.date
+    dates = df["transaction_date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+    # floor keeps datetime64 (int64 group keys) instead of object datetime.date
+    date_only = dates.dt.floor("D")
 
     g = (
-        d.groupby(["site", "date_only"])["refund_amount"]
+        df.groupby([df["site"], date_only])["refund_amount"]
         .agg(daily_refund_value="sum", daily_refund_count="count")
         .reset_index()
-        .rename(columns={"date_only": "transaction_date"})
-        .sort_values(["daily_refund_value"], ascending=False)
-        .head(top_n)
+        .nlargest(top_n, "daily_refund_value")
     )
     return g
 
@@ -73,6 +100,7 @@ def sqri(
     df: pd.DataFrame,
     weights: Optional[SQRIWeights] = None,
     high_value_threshold: float = 100.0,
+    assume_clean: bool = True,
 ) -> pd.DataFrame:
     """
     Sleep Quality Risk Index (proxy).
@@ -82,6 +110,8 @@ def sqri(
       - high value share = % refunds >= threshold
     Weighted sum (normalized accommodation avg by dividing by 100 for readability).
     Output per site.
+
+    assume_clean: skip numeric coercion / null dropping (see kpis).
     """
     weights = weights or SQRIWeights()
 
@@ -96,28 +126,39 @@ def sqri(
             "sqri_score",
         ])
 
-    d = df.copy()
-    d["refund_amount"] = pd.to_numeric(d["refund_amount"], errors="coerce")
-    d = d.dropna(subset=["refund_amount", "site"])
-
-    total_by_site = d.groupby("site")["refund_amount"].sum().rename("total_value")
-
-    acc_mask = d["refund_category"].astype(str).str.lower().eq("accommodation")
-    acc_by_site = d.loc[acc_mask].groupby("site")["refund_amount"].sum().rename("accommodation_value")
-    acc_avg_by_site = d.loc[acc_mask].groupby("site")["refund_amount"].mean().rename("accommodation_avg")
-
-    high_value_by_site = (
-        (d["refund_amount"] >= float(high_value_threshold))
-        .groupby(d["site"])
-        .mean()
-        .rename("high_value_share")
-    )
-
-    out = pd.concat([total_by_site, acc_by_site, acc_avg_by_site, high_value_by_site], axis=1).fillna(0.0).reset_index()
-
-    out["accommodation_share_value"] = out.apply(
-        lambda r: (r["accommodation_value"] / r["total_value"]) if r["total_value"] else 0.0, axis=1
-    )
+    d = df[["site", "refund_amount", "refund_category"]]
+    if not assume_clean:
+        d = d.copy()
+        d["refund_amount"] = pd.to_numeric(d["refund_amount"], errors="coerce")
+        d = d.dropna(subset=["refund_amount", "site"])
+
+    acc_mask = d["refund_category"].astype(str).str.lower().eq("accommodation").to_numpy(dtype=bool)
+    amount = d["refund_amount"].to_numpy(dtype="float64", na_value=np.nan)
+    acc_amount = np.where(acc_mask, amount, 0.0)
+    is_high = amount >= float(high_value_threshold)
+
+    # Per-site sums via factorize + bincount (a couple of sites, so this beats
+    # a groupby). sort=True keeps the previous site order; rows with a null site
+    # or a null amount (-1) drop out, as with the coercing path's dropna.
+    codes, sites = pd.factorize(d["site"].where(~np.isnan(amount)), sort=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    n = len(sites)
+
+    count = np.bincount(codes, minlength=n)
+    total = np.bincount(codes, weights=amount[valid], minlength=n)
+    acc_value = np.bincount(codes, weights=acc_amount[valid], minlength=n)
+    acc_count = np.bincount(codes, weights=acc_mask[valid], minlength=n)
+    high_count = np.bincount(codes, weights=is_high[valid], minlength=n)
+
+    out = pd.DataFrame({
+        "site": sites,
+        "total_value": total,
+        "accommodation_value": acc_value,
+        "accommodation_avg": np.divide(acc_value, acc_count, out=np.zeros(n), where=acc_count > 0),
+        "high_value_share": high_count / count,
+        "accommodation_share_value": np.divide(acc_value, total, out=np.zeros(n), where=total != 0),
+    })
 
     # Normalize accommodation avg (divide by 100) so scale is comparable to shares.
     out["accommodation_avg_norm"] = out["accommodation_avg"] / 100.0
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -22,19 +23,44 @@ def row_count_reconciliation(raw_rows: int, refund_rows: int, analysis_rows: int
     }
 
 
+def _linear_quantiles(a: np.ndarray, qs: Tuple[float, ...]) -> Tuple[float, ...]:
+    """
+    Same values as Series.quantile (linear interpolation), but all requested
+    quantiles come from a single O(N) np.partition instead of one pass each.
+    """
+    n = a.size
+    pos = [q * (n - 1) for q in qs]
+    lo = [int(p) for p in pos]
+    hi = [min(i + 1, n - 1) for i in lo]
+    part = np.partition(a, sorted(set(lo + hi)))
+
+    out = []
+    for p, i, j in zip(pos, lo, hi):
+        t = p - i
+        x, y = part[i], part[j]
+        # numpy's lerp form, so results match np.quantile bit for bit
+        out.append(float(x + (y - x) * t if t < 0.5 else y - (y - x) * (1 - t)))
+    return tuple(out)
+
+
 def amount_sanity_checks(df: pd.DataFrame, amount_col: str = "refund_amount") -> Dict[str, float]:
     if amount_col not in df.columns or df.empty:
         return {"min": float("nan"), "p50": float("nan"), "p90": float("nan"), "max": float("nan")}
 
-    s = pd.to_numeric(df[amount_col], errors="coerce").dropna()
-    if s.empty:
+    s = df[amount_col]
+    if not pd.api.types.is_float_dtype(s):
+        s = pd.to_numeric(s, errors="coerce")
+    a = s.to_numpy(dtype="float64", na_value=np.nan)
+    a = a[~np.isnan(a)]
+    if a.size == 0:
         return {"min": float("nan"), "p50": float("nan"), "p90": float("nan"), "max": float("nan")}
 
+    p50, p90 = _linear_quantiles(a, (0.50, 0.90))
     return {
-        "min": float(s.min()),
-        "p50": float(s.quantile(0.50)),
-        "p90": float(s.quantile(0.90)),
-        "max": float(s.max()),
+        "min": float(a.min()),
+        "p50": p50,
+        "p90": p90,
+        "max": float(a.max()),
     }
 
 
@@ -56,9 +82,17 @@ def duplicate_check(
     if missing:
         return {"duplicate_rows": 0, "note_missing_key_cols": len(missing)}
 
-    dup_mask = df.duplicated(subset=list(key_cols), keep=False)
+    # Factorize each key column to int codes (NaN -> -1, so nulls compare equal
+    # like df.duplicated), pack each row into one fixed-width key and count.
+    codes = np.column_stack(
+        [pd.factorize(df[c], sort=False)[0].astype(np.int64) for c in key_cols]
+    )
+    packed = np.ascontiguousarray(codes).view(np.dtype((np.void, codes.dtype.itemsize * codes.shape[1])))
+    _, inverse, counts = np.unique(packed.ravel(), return_inverse=True, return_counts=True)
+
+    dup_mask = counts[inverse] > 1
     dup_rows = int(dup_mask.sum())
-    distinct_keys = int(df.loc[dup_mask, list(key_cols)].drop_duplicates().shape[0]) if dup_rows else 0
+    distinct_keys = int((counts > 1).sum())
     return {"duplicate_rows": dup_rows, "distinct_duplicate_keys": distinct_keys}
 
 